@@ -4,50 +4,67 @@ A production-ready chatbot with persistent user memory named Alexa.
 """
 
 import os
+import re
 import sys
-import json
-import requests
-from typing import List, Dict, Optional
+import orjson
+import asyncio
+import threading
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
-from dotenv import load_dotenv
+from src.chatbot import OpenAIChatbot as BaseChatbot
+from src.config import ChatbotConfig as BaseConfig
+from src.conversation import ConversationManager as BaseConversationManager
 
-load_dotenv()
+QUIT_COMMANDS = {'/quit', '/exit'}
 
+PROMPT = "You: "
 
-class ChatbotConfig:
+# Common ways of introducing oneself, followed by the name. Explicit
+# phrases are tried first so "This is urgent, my name is Bob" finds Bob.
+NAME_PATTERNS = (
+    re.compile(r"\b(?:my name is|call me)\s+([A-Za-z][A-Za-z'-]{1,30})\b", re.IGNORECASE),
+    re.compile(r"\b(?:i['’]m|i am|this is)\s+([A-Za-z][A-Za-z'-]{1,30})\b", re.IGNORECASE)
+)
+
+STATIC_SYSTEM_PROMPT = """You are Alexa, a helpful and professional customer support assistant.
+Your role is to:
+- Answer customer questions clearly and concisely
+- Be polite, patient, and empathetic
+- Provide accurate information
+- Remember and use the user's name when appropriate
+- Maintain a friendly and professional tone
+
+IMPORTANT:
+- Your name is Alexa
+- When asked what model you are, say you are "Alexa, powered by GPT-4o Mini"
+- If the user tells you their name, acknowledge it warmly and remember it
+- Always use the user's name naturally in conversation when you know it"""
+
+
+class ChatbotConfig(BaseConfig):
     """Configuration management for the chatbot."""
     
     def __init__(self):
-        self.api_key = os.environ.get("OPENAI_API_KEY")
-        self.api_url = "https://api.openai.com/v1/chat/completions"
-        self.model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
-        self.max_tokens = int(os.environ.get("OPENAI_MAX_TOKENS", "1000"))
-        self.temperature = float(os.environ.get("OPENAI_TEMPERATURE", "0.7"))
-        self.timeout = 30
-        self.memory_file = "data/user_memory.json"
-        
-    def validate(self) -> bool:
-        """Validate that required configuration is present."""
-        if not self.api_key:
-            print("ERROR: OPENAI_API_KEY environment variable not set.")
-            print("Please create a .env file with your API key.")
-            return False
-        return True
+        super().__init__()
+        self.memory_save_delay = 1.0
 
 
 class UserMemory:
     """Manages persistent user information."""
     
-    def __init__(self, memory_file: str):
+    def __init__(self, memory_file: str, save_delay: float = 1.0):
         self.memory_file = memory_file
+        self.save_delay = save_delay
         self.memory = self._load_memory()
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
     
     def _load_memory(self) -> Dict:
         """Load user memory from file."""
         if os.path.exists(self.memory_file):
             try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.memory_file, 'rb') as f:
+                    return orjson.loads(f.read())
             except Exception:
                 return {}
         return {}
@@ -55,8 +72,29 @@ class UserMemory:
     def _save_memory(self) -> None:
         """Save user memory to file."""
         os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.memory, f, indent=2, ensure_ascii=False)
+        with open(self.memory_file, 'wb') as f:
+            f.write(orjson.dumps(self.memory, option=orjson.OPT_INDENT_2))
+    
+    def _schedule_save(self) -> None:
+        """Mark memory dirty and coalesce writes made within save_delay."""
+        self._dirty = True
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._save_handle = loop.call_later(self.save_delay, self.flush)
+    
+    def flush(self) -> None:
+        """Write pending changes to disk, if any."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._save_memory()
     
     def get_user_name(self) -> Optional[str]:
         """Get stored user name."""
@@ -66,7 +104,7 @@ class UserMemory:
         """Store user name."""
         self.memory['user_name'] = name
         self.memory['last_updated'] = datetime.now().isoformat()
-        self._save_memory()
+        self._schedule_save()
     
     def get_memory_summary(self) -> str:
         """Get a summary of stored memory for the system prompt."""
@@ -77,181 +115,96 @@ class UserMemory:
     def clear_memory(self) -> None:
         """Clear all stored memory."""
         self.memory = {}
-        self._save_memory()
+        self._schedule_save()
 
 
-class ConversationManager:
-    """Manages conversation history and context."""
+class ConversationManager(BaseConversationManager):
+    """Manages conversation history and context, including user memory."""
+    
+    PREFIX_SIZE = 2
     
-    def __init__(self, user_memory: UserMemory, system_prompt: Optional[str] = None):
-        self.messages: List[Dict[str, str]] = []
+    def __init__(self, user_memory: UserMemory, system_prompt: Optional[str] = None,
+                 max_turns: int = 10, log_file: str = "data/conversations/current.jsonl"):
         self.user_memory = user_memory
-        self.system_prompt = system_prompt or self._default_system_prompt()
-        self.messages.append({"role": "system", "content": self.system_prompt})
-        
+        super().__init__(system_prompt, max_turns, log_file)
+    
     def _default_system_prompt(self) -> str:
         """Returns default system prompt for customer support."""
-        memory_info = self.user_memory.get_memory_summary()
-        base_prompt = """You are Alexa, a helpful and professional customer support assistant. 
-        Your role is to:
-        - Answer customer questions clearly and concisely
-        - Be polite, patient, and empathetic
-        - Provide accurate information
-        - Remember and use the user's name when appropriate
-        - Maintain a friendly and professional tone
-        
-        IMPORTANT: 
-        - Your name is Alexa
-        - When asked what model you are, say you are "Alexa, powered by GPT-4o Mini"
-        - If the user tells you their name, acknowledge it warmly and remember it
-        - Always use the user's name naturally in conversation when you know it"""
+        return STATIC_SYSTEM_PROMPT
+    
+    def _prefix_messages(self) -> List[Dict[str, str]]:
+        """Returns the static prompt followed by the memory message.
         
-        if memory_info:
-            base_prompt += f"\n\nREMEMBERED INFORMATION:\n{memory_info}"
+        The static prompt stays at index 0 so every request shares the same
+        cacheable prefix; per-user memory lives in its own message at index 1.
+        """
+        return [{"role": "system", "content": self.system_prompt}, self._memory_message()]
+    
+    def _memory_message(self) -> Dict[str, str]:
+        """Returns the system message carrying remembered user information."""
+        memory_info = self.user_memory.get_memory_summary() or "Nothing remembered yet."
+        return {"role": "system", "content": f"REMEMBERED INFORMATION:\n{memory_info}"}
+    
+    def refresh_memory(self) -> None:
+        """Update the memory message after the stored memory changes.
         
-        return base_prompt
+        The new message is also appended to the log, so a replayed or
+        exported transcript sees the memory the later turns were sent with.
+        """
+        self.messages[1] = self._memory_message()
+        self._log_message(self.messages[1])
     
     def add_user_message(self, content: str) -> None:
-        """Add a user message and check for name mentions."""
-        self.messages.append({"role": "user", "content": content})
+        """Add a user message and check for name mentions.
+        
+        The name is extracted first so the memory update is logged before
+        the message, and popping a failed message leaves it in place.
+        """
         self._extract_user_name(content)
+        super().add_user_message(content)
     
     def _extract_user_name(self, message: str) -> None:
         """Try to extract user name from message."""
-        lower_msg = message.lower()
-        
-        # Common patterns for name introduction
-        patterns = [
-            "my name is ",
-            "i'm ",
-            "i am ",
-            "call me ",
-            "this is "
-        ]
-        
-        for pattern in patterns:
-            if pattern in lower_msg:
-                start = lower_msg.index(pattern) + len(pattern)
-                # Get the next word (name)
-                words = message[start:].split()
-                if words:
-                    name = words[0].strip('.,!?').capitalize()
-                    if len(name) > 1 and name.isalpha():
-                        self.user_memory.set_user_name(name)
-                        print(f"\n[Memory Updated: User name saved as '{name}']\n")
-                        break
-    
-    def add_assistant_message(self, content: str) -> None:
-        """Add an assistant message to the conversation history."""
-        self.messages.append({"role": "assistant", "content": content})
-    
-    def get_messages(self) -> List[Dict[str, str]]:
-        """Get all conversation messages."""
-        return self.messages
-    
-    def reset(self) -> None:
-        """Reset conversation, keeping memory and system prompt."""
-        self.system_prompt = self._default_system_prompt()
-        self.messages = [{"role": "system", "content": self.system_prompt}]
-    
-    def export_conversation(self, filename: Optional[str] = None) -> str:
-        """Export conversation to a JSON file."""
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"data/conversations/conversation_{timestamp}.json"
-        
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.messages, f, indent=2, ensure_ascii=False)
-        
-        return filename
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(message)
+            if match:
+                name = match.group(1).capitalize()
+                self.user_memory.set_user_name(name)
+                self.refresh_memory()
+                print(f"\n[Memory Updated: User name saved as '{name}']\n")
+                break
 
 
-class OpenAIChatbot:
-    """Handles communication with OpenAI API."""
+class OpenAIChatbot(BaseChatbot):
+    """Customer support chatbot that remembers the user across sessions."""
     
     def __init__(self, config: ChatbotConfig):
-        self.config = config
-        self.user_memory = UserMemory(config.memory_file)
-        self.conversation = ConversationManager(self.user_memory)
-    
-    def _make_api_request(self) -> Optional[Dict]:
-        """Make HTTP request to OpenAI API."""
-        headers = {
-            "Authorization": f"Bearer {self.config.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": self.config.model,
-            "messages": self.conversation.get_messages(),
-            "max_tokens": self.config.max_tokens,
-            "temperature": self.config.temperature
-        }
-        
-        try:
-            response = requests.post(
-                self.config.api_url,
-                headers=headers,
-                json=payload,
-                timeout=self.config.timeout
-            )
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.Timeout:
-            print("ERROR: Request timed out. Please try again.")
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 401:
-                print("ERROR: Invalid API key.")
-            elif response.status_code == 429:
-                print("ERROR: Rate limit exceeded.")
-            else:
-                print(f"ERROR: HTTP error: {e}")
-            return None
-            
-        except requests.exceptions.RequestException as e:
-            print(f"ERROR: Network error: {e}")
-            return None
-    
-    def send_message(self, user_message: str) -> Optional[str]:
-        """Send a message and get chatbot response."""
-        if not user_message.strip():
-            return "Please enter a valid message."
-        
-        self.conversation.add_user_message(user_message)
-        response_data = self._make_api_request()
-        
-        if response_data is None:
-            self.conversation.messages.pop()
-            return None
-        
-        try:
-            assistant_message = response_data['choices'][0]['message']['content']
-            self.conversation.add_assistant_message(assistant_message)
-            return assistant_message
-        except (KeyError, IndexError) as e:
-            print(f"ERROR: Unexpected API response: {e}")
-            return None
+        self.user_memory = UserMemory(config.memory_file, save_delay=config.memory_save_delay)
+        super().__init__(config)
+    
+    def _create_conversation(self) -> ConversationManager:
+        """Create a conversation that carries the user's memory."""
+        return ConversationManager(
+            self.user_memory,
+            max_turns=self.config.max_turns,
+            log_file=self.config.conversation_log_file
+        )
+    
+    async def aclose(self) -> None:
+        """Close the chatbot and write any pending memory changes."""
+        await super().aclose()
+        self.user_memory.flush()
     
     def reset_conversation(self) -> None:
         """Reset the conversation."""
+        self._cancel_summary()
         self.conversation.reset()
         print("Conversation has been reset. (User memory retained)")
     
-    def export_conversation(self, filename: Optional[str] = None) -> None:
-        """Export conversation history."""
-        try:
-            filepath = self.conversation.export_conversation(filename)
-            print(f"Conversation exported to: {filepath}")
-        except Exception as e:
-            print(f"ERROR: Failed to export: {e}")
-    
     def forget_me(self) -> None:
         """Clear all user memory."""
         self.user_memory.clear_memory()
+        self._cancel_summary()
         self.conversation.reset()
         print("All user memory has been cleared.")
     
@@ -283,64 +236,156 @@ def print_welcome_message():
     print("="*60 + "\n")
 
 
-def main():
-    """Main application loop."""
-    config = ChatbotConfig()
+class StreamPrinter:
+    """Prints streamed reply tokens as they arrive."""
     
-    if not config.validate():
-        sys.exit(1)
+    def __init__(self):
+        self.started = False
     
-    chatbot = OpenAIChatbot(config)
-    print_welcome_message()
+    def __call__(self, token: str) -> None:
+        if not self.started:
+            print("\nAlexa: ", end="")
+            self.started = True
+        print(token, end="", flush=True)
+
+
+async def ainput(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
     
-    # Greet user by name if remembered
-    user_name = chatbot.user_memory.get_user_name()
-    if user_name:
-        print(f"👋 Welcome back, {user_name}!\n")
+    input() runs in a daemon thread rather than the default executor, so
+    a pending read never keeps the process alive after Ctrl+C.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
     
+    def resolve(line: Optional[str], error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+    
+    def read() -> None:
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, line, None)
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
+async def read_input(queue: asyncio.Queue) -> None:
+    """Read user input and queue it, so typing never waits on a reply.
+    
+    After a line is queued the next read shows no prompt of its own;
+    process_input prints it below the reply instead.
+    """
+    prompt = PROMPT
     while True:
         try:
-            user_input = input("You: ").strip()
-            
-            if not user_input:
-                continue
-            
-            if user_input.lower() in ['/quit', '/exit']:
-                print("\nThank you for chatting with Alexa. Goodbye!")
-                break
-            
-            elif user_input.lower() == '/reset':
-                chatbot.reset_conversation()
-                continue
-            
-            elif user_input.lower() == '/export':
-                chatbot.export_conversation()
-                continue
-            
-            elif user_input.lower() == '/memory':
-                chatbot.show_memory()
+            user_input = (await ainput(prompt)).strip()
+        except EOFError:
+            await queue.put(None)
+            return
+        
+        if not user_input:
+            continue
+        
+        command = user_input.lower()
+        if command in QUIT_COMMANDS:
+            await queue.put(None)
+            return
+        
+        if command == '/forget':
+            confirm = await ainput("Are you sure you want to clear all memory? (yes/no): ")
+            if confirm.lower() != 'yes':
+                prompt = PROMPT
                 continue
-            
-            elif user_input.lower() == '/forget':
-                confirm = input("Are you sure you want to clear all memory? (yes/no): ")
-                if confirm.lower() == 'yes':
-                    chatbot.forget_me()
+        
+        await queue.put(user_input)
+        prompt = ""
+
+
+async def process_input(queue: asyncio.Queue, chatbot: OpenAIChatbot, config: ChatbotConfig) -> None:
+    """Handle queued commands and messages in order until the user quits.
+    
+    Once nothing else is waiting, the prompt is shown again under the
+    reply, ready for the read that read_input already has pending.
+    """
+    commands: Dict[str, Callable[[], None]] = {
+        '/reset': chatbot.reset_conversation,
+        '/export': chatbot.export_conversation,
+        '/memory': chatbot.show_memory,
+        '/forget': chatbot.forget_me
+    }
+    
+    while True:
+        user_input = await queue.get()
+        if user_input is None:
+            print("\nThank you for chatting with Alexa. Goodbye!")
+            return
+        
+        try:
+            handler = commands.get(user_input.lower())
+            if handler is not None:
+                handler()
                 continue
             
-            response = chatbot.send_message(user_input)
+            printer = StreamPrinter() if config.stream else None
+            response = await chatbot.send_message(user_input, on_token=printer)
             
-            if response:
+            if printer is not None and printer.started:
+                print("\n")
+            elif response:
                 print(f"\nAlexa: {response}\n")
-            else:
+            
+            if not response:
                 print("Failed to get response. Please try again.\n")
         
-        except KeyboardInterrupt:
-            print("\n\nSession interrupted. Exiting...")
-            break
-        
         except Exception as e:
             print(f"\nUnexpected error: {e}\n")
+        
+        finally:
+            if queue.empty():
+                print(PROMPT, end="", flush=True)
+
+
+async def amain():
+    """Main application loop."""
+    config = ChatbotConfig()
+    
+    if not config.validate():
+        sys.exit(1)
+    
+    chatbot = OpenAIChatbot(config)
+    print_welcome_message()
+    
+    # Greet user by name if remembered
+    user_name = chatbot.user_memory.get_user_name()
+    if user_name:
+        print(f"👋 Welcome back, {user_name}!\n")
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    try:
+        await asyncio.gather(
+            read_input(queue),
+            process_input(queue, chatbot, config)
+        )
+    finally:
+        await chatbot.aclose()
+
+
+def main():
+    """Run the chatbot until the user quits."""
+    try:
+        asyncio.run(amain())
+    except KeyboardInterrupt:
+        print("\n\nSession interrupted. Exiting...")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
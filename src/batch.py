@@ -0,0 +1,167 @@
+"""Offline chat completions through the OpenAI Batch API."""
+
+import sys
+import asyncio
+import httpx
+import orjson
+from typing import List, Dict, Optional
+from .config import ChatbotConfig
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def load_conversation(filename: str) -> List[Dict[str, str]]:
+    """Read a conversation exported as JSONL."""
+    with open(filename, 'rb') as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+
+def replay_requests(messages: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+    """Turn an exported conversation into one request per user turn.
+    
+    Each request carries the conversation up to and including that user
+    message, so a batch re-answers every turn in its original context.
+    """
+    return [
+        messages[:i + 1]
+        for i, message in enumerate(messages)
+        if message["role"] == "user"
+    ]
+
+
+class BatchChatbot:
+    """Runs chat completions through the Batch API.
+    
+    Batches are billed at half price and draw on a separate rate-limit
+    pool, but results arrive within the completion window rather than in
+    real time, so this suits offline evaluation and conversation replay.
+    """
+    
+    def __init__(self, config: ChatbotConfig):
+        self.config = config
+        self._client = httpx.AsyncClient(
+            base_url=config.api_base,
+            headers={"Authorization": f"Bearer {config.api_key}"},
+            timeout=config.timeout
+        )
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
+    
+    def _build_input_file(self, messages_list: List[List[Dict[str, str]]]) -> bytes:
+        """Encode one chat completion request per line as JSONL."""
+        lines = []
+        for i, messages in enumerate(messages_list):
+            request = {
+                "custom_id": f"request-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.config.model,
+                    "messages": messages,
+                    "max_tokens": self.config.max_tokens,
+                    "temperature": self.config.temperature
+                }
+            }
+            lines.append(orjson.dumps(request))
+        return b"\n".join(lines) + b"\n"
+    
+    async def submit_batch(self, messages_list: List[List[Dict[str, str]]]) -> str:
+        """Upload the requests and create a batch, returning its ID."""
+        upload = await self._client.post(
+            "/files",
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", self._build_input_file(messages_list))}
+        )
+        upload.raise_for_status()
+        
+        batch = await self._client.post("/batches", json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        })
+        batch.raise_for_status()
+        return batch.json()["id"]
+    
+    async def wait_for_batch(self, batch_id: str) -> Dict:
+        """Poll with exponential backoff until the batch stops running."""
+        delay = self.config.batch_poll_interval
+        while True:
+            response = await self._client.get(f"/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            if batch["status"] in TERMINAL_STATUSES:
+                return batch
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.config.batch_max_poll_interval)
+    
+    async def get_results(self, batch: Dict, count: int) -> List[Optional[str]]:
+        """Download a finished batch's output, ordered like the input."""
+        results: List[Optional[str]] = [None] * count
+        output_file_id = batch.get("output_file_id")
+        if not output_file_id:
+            return results
+        
+        response = await self._client.get(f"/files/{output_file_id}/content")
+        response.raise_for_status()
+        
+        for line in response.content.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            index = int(item["custom_id"].rsplit("-", 1)[1])
+            body = (item.get("response") or {}).get("body") or {}
+            try:
+                results[index] = body['choices'][0]['message']['content']
+            except (KeyError, IndexError):
+                pass
+        return results
+    
+    async def run(self, messages_list: List[List[Dict[str, str]]]) -> List[Optional[str]]:
+        """Submit a batch and wait for its replies; None marks failed requests."""
+        try:
+            batch_id = await self.submit_batch(messages_list)
+            batch = await self.wait_for_batch(batch_id)
+            if batch["status"] != "completed":
+                print(f"ERROR: Batch {batch_id} ended with status '{batch['status']}'.")
+            return await self.get_results(batch, len(messages_list))
+        
+        except httpx.HTTPError as e:
+            print(f"ERROR: Batch request failed: {e}")
+            return [None] * len(messages_list)
+
+
+async def replay(filename: str) -> None:
+    """Re-answer every user turn of an exported conversation in one batch."""
+    config = ChatbotConfig()
+    if not config.validate():
+        sys.exit(1)
+    
+    requests = replay_requests(load_conversation(filename))
+    if not requests:
+        print("No user messages to replay.")
+        return
+    
+    chatbot = BatchChatbot(config)
+    try:
+        print(f"Submitting {len(requests)} requests; waiting for the batch to finish...")
+        replies = await chatbot.run(requests)
+    finally:
+        await chatbot.aclose()
+    
+    for messages, reply in zip(requests, replies):
+        print(f"\nYou: {messages[-1]['content']}")
+        print(f"Alexa: {reply if reply is not None else '[no reply]'}")
+
+
+def main():
+    """Entry point for python -m src.batch <export.jsonl>."""
+    if len(sys.argv) != 2:
+        print("Usage: python -m src.batch <export.jsonl>")
+        sys.exit(2)
+    asyncio.run(replay(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Exact-match caching of chat completion responses."""
+
+import os
+import time
+import shelve
+import hashlib
+import orjson
+from typing import List, Dict, Optional
+
+
+class LLMCache:
+    """Persistent response cache keyed by a hash of the full request."""
+    
+    def __init__(self, cache_file: str, ttl: int = 3600):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        self._store = shelve.open(cache_file)
+    
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]],
+                 temperature: float, max_tokens: int) -> str:
+        """Build a SHA-256 key from everything that shapes the response."""
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        encoded = orjson.dumps(request, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None if missing or expired."""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._store[key]
+            return None
+        return value
+    
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store a response for the given number of seconds."""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        self._store[key] = (expires_at, value)
+    
+    def close(self) -> None:
+        """Flush and close the underlying store."""
+        self._store.close()
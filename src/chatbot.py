@@ -1,81 +1,325 @@
 """OpenAI API integration."""
 
-import requests
-from typing import Optional, Dict
+import asyncio
+import httpx
+import orjson
+from typing import Callable, List, Dict, Optional
+from .cache import LLMCache
 from .config import ChatbotConfig
 from .conversation import ConversationManager
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+SUMMARY_PROMPT = (
+    "Summarize the following conversation in at most 150 tokens, "
+    "preserving facts and user preferences."
+)
+
 
 class OpenAIChatbot:
     """Handles communication with OpenAI API."""
     
     def __init__(self, config: ChatbotConfig):
         self.config = config
-        self.conversation = ConversationManager()
-    
-    def _make_api_request(self) -> Optional[Dict]:
-        """Make HTTP request to OpenAI API."""
-        headers = {
-            "Authorization": f"Bearer {self.config.api_key}",
-            "Content-Type": "application/json"
+        self.conversation = self._create_conversation()
+        self.cache = LLMCache(config.cache_file, ttl=config.cache_ttl)
+        self.semantic_cache = None
+        if config.semantic_cache_enabled:
+            from .semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache(
+                config.semantic_cache_file,
+                threshold=config.semantic_cache_threshold
+            )
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {config.api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=config.timeout,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=config.max_retries,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+            )
+        )
+        self._in_flight = asyncio.Semaphore(config.max_in_flight)
+        self._summary_task: Optional[asyncio.Task] = None
+        self._summary_count = 0
+        self._payload_template = {
+            "model": config.model,
+            "messages": None,
+            "max_tokens": config.max_tokens,
+            "temperature": config.temperature
         }
+    
+    def _create_conversation(self) -> ConversationManager:
+        """Create the conversation history this chatbot talks through."""
+        return ConversationManager(
+            max_turns=self.config.max_turns,
+            log_file=self.config.conversation_log_file
+        )
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client and persist history and caches."""
+        self._cancel_summary()
+        await self._client.aclose()
+        self.conversation.close()
+        self.cache.close()
+        if self.semantic_cache is not None:
+            self.semantic_cache.save()
+    
+    async def _post(self, body: bytes) -> httpx.Response:
+        """POST to the API, retrying transient failures with exponential backoff."""
+        for attempt in range(self.config.max_retries + 1):
+            async with self._in_flight:
+                response = await self._client.post(self.config.api_url, content=body)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.config.max_retries:
+                break
+            await asyncio.sleep(self.config.retry_backoff * 2 ** attempt)
+        return response
+    
+    def _encode_payload(self, messages: Optional[List[Dict[str, str]]] = None,
+                        **overrides) -> bytes:
+        """Serialize a request body, defaulting to the conversation history.
         
-        payload = {
-            "model": self.config.model,
-            "messages": self.conversation.get_messages(),
-            "max_tokens": self.config.max_tokens,
-            "temperature": self.config.temperature
-        }
+        The shared template is only copied when fields are overridden; it is
+        serialized immediately, so concurrent requests never see each
+        other's messages.
+        """
+        if messages is None:
+            messages = self.conversation.get_messages()
         
-        try:
-            response = requests.post(
-                self.config.api_url,
-                headers=headers,
-                json=payload,
-                timeout=self.config.timeout
-            )
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.Timeout:
+        payload = self._payload_template
+        if overrides:
+            payload = {**payload, **overrides}
+        payload["messages"] = messages
+        return orjson.dumps(payload)
+    
+    def _report_error(self, error: httpx.HTTPError) -> None:
+        """Print a user-facing message for a failed API request."""
+        if isinstance(error, httpx.TimeoutException):
             print("ERROR: Request timed out. Please try again.")
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 401:
+        elif isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code == 401:
                 print("ERROR: Invalid API key.")
-            elif response.status_code == 429:
+            elif error.response.status_code == 429:
                 print("ERROR: Rate limit exceeded.")
             else:
-                print(f"ERROR: HTTP error: {e}")
+                print(f"ERROR: HTTP error: {error}")
+        else:
+            print(f"ERROR: Network error: {error}")
+    
+    async def _make_api_request(self, messages: Optional[List[Dict[str, str]]] = None,
+                                model: Optional[str] = None,
+                                max_tokens: Optional[int] = None) -> Optional[Dict]:
+        """Make HTTP request to OpenAI API, defaulting to the conversation history."""
+        overrides = {}
+        if model is not None:
+            overrides["model"] = model
+        if max_tokens is not None:
+            overrides["max_tokens"] = max_tokens
+        
+        try:
+            response = await self._post(self._encode_payload(messages, **overrides))
+            response.raise_for_status()
+            return orjson.loads(response.content)
+            
+        except httpx.HTTPError as e:
+            self._report_error(e)
             return None
+        except orjson.JSONDecodeError as e:
+            print(f"ERROR: Unexpected API response: {e}")
+            return None
+    
+    async def _stream_api_request(self, on_token: Callable[[str], None]) -> Optional[str]:
+        """Stream a reply to the conversation, passing each token to on_token.
+        
+        Retryable status codes are retried like _post; they arrive before
+        any token, so nothing has been shown yet when a retry happens.
+        """
+        body = self._encode_payload(stream=True)
+        tokens = []
+        
+        try:
+            for attempt in range(self.config.max_retries + 1):
+                async with self._in_flight, self._client.stream(
+                    "POST", self.config.api_url, content=body
+                ) as response:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == self.config.max_retries:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data: "):
+                                continue
+                            data = line[len("data: "):]
+                            if data == "[DONE]":
+                                break
+                            event = orjson.loads(data)
+                            if "error" in event:
+                                print(f"ERROR: API error: {event['error']}")
+                                return None
+                            choices = event.get("choices")
+                            if not choices:
+                                continue
+                            token = choices[0].get("delta", {}).get("content")
+                            if token:
+                                tokens.append(token)
+                                on_token(token)
+                        break
+                await asyncio.sleep(self.config.retry_backoff * 2 ** attempt)
             
-        except requests.exceptions.RequestException as e:
-            print(f"ERROR: Network error: {e}")
+        except httpx.HTTPError as e:
+            self._report_error(e)
+            return None
+        except orjson.JSONDecodeError as e:
+            print(f"ERROR: Unexpected API response: {e}")
             return None
+        
+        if not tokens:
+            print("ERROR: Empty response from API.")
+            return None
+        return "".join(tokens)
+    
+    def _start_summary(self) -> None:
+        """Start folding turns older than the recent window into a summary.
+        
+        The summary request runs in the background after a reply is shown,
+        so it overlaps with the user typing rather than delaying the next
+        reply; _apply_summary picks it up before the next request.
+        """
+        if self._summary_task is not None or not self.conversation.needs_summary():
+            return
+        
+        old_messages = self.conversation.get_messages_to_summarize()
+        self._summary_count = len(old_messages)
+        self._summary_task = asyncio.create_task(self._summarize(old_messages))
+    
+    async def _apply_summary(self) -> None:
+        """Wait for a pending summary and fold it into the history."""
+        if self._summary_task is None:
+            return
+        
+        task, self._summary_task = self._summary_task, None
+        summary = await task
+        if summary is not None:
+            self.conversation.apply_summary(summary, self._summary_count)
+    
+    def _cancel_summary(self) -> None:
+        """Drop a pending summary, e.g. because the history was reset."""
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+            self._summary_task = None
+    
+    async def _summarize(self, old_messages: List[Dict[str, str]]) -> Optional[str]:
+        """Summarize old_messages with the summary model."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in old_messages)
+        response_data = await self._make_api_request(
+            [
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript}
+            ],
+            model=self.config.summary_model,
+            max_tokens=self.config.summary_max_tokens
+        )
+        
+        if response_data is None:
+            return None
+        try:
+            return response_data['choices'][0]['message']['content'] or None
+        except (KeyError, IndexError):
+            return None
+    
+    def _cache_key(self) -> Optional[str]:
+        """Cache key for the pending request, or None if it is not deterministic."""
+        if self.config.temperature != 0:
+            return None
+        return LLMCache.make_key(
+            self.config.model,
+            self.conversation.get_messages(),
+            self.config.temperature,
+            self.config.max_tokens
+        )
     
-    def send_message(self, user_message: str) -> Optional[str]:
-        """Send a message and get chatbot response."""
+    async def send_message(self, user_message: str,
+                           on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Send a message and get chatbot response.
+        
+        If on_token is given, the reply is streamed and each token is passed
+        to it as it arrives; cached replies are passed as a single token.
+        """
         if not user_message.strip():
             return "Please enter a valid message."
         
+        await self._apply_summary()
         self.conversation.add_user_message(user_message)
-        response_data = self._make_api_request()
         
-        if response_data is None:
-            self.conversation.messages.pop()
-            return None
+        cached = None
+        cache_key = self._cache_key()
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
         
-        try:
-            assistant_message = response_data['choices'][0]['message']['content']
-            self.conversation.add_assistant_message(assistant_message)
-            return assistant_message
-        except (KeyError, IndexError) as e:
-            print(f"ERROR: Unexpected API response: {e}")
+        if cached is None and self.semantic_cache is not None:
+            context = self.semantic_cache.context_key(self.conversation.get_turn_context())
+            vector = await asyncio.to_thread(self.semantic_cache.embed, user_message)
+            cached = self.semantic_cache.get(vector, context)
+        
+        if cached is not None:
+            self.conversation.add_assistant_message(cached)
+            self._start_summary()
+            if on_token is not None:
+                on_token(cached)
+            return cached
+        
+        if on_token is not None:
+            assistant_message = await self._stream_api_request(on_token)
+        else:
+            assistant_message = None
+            response_data = await self._make_api_request()
+            if response_data is not None:
+                try:
+                    assistant_message = response_data['choices'][0]['message']['content']
+                except (KeyError, IndexError) as e:
+                    print(f"ERROR: Unexpected API response: {e}")
+        
+        # An empty reply is a failure too: keeping or caching it would
+        # replay the blank answer for every identical request.
+        if not assistant_message:
+            self.conversation.pop_message()
             return None
+        
+        self.conversation.add_assistant_message(assistant_message)
+        self._start_summary()
+        if cache_key is not None:
+            self.cache.set(cache_key, assistant_message)
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(vector, context, assistant_message)
+        return assistant_message
+    
+    async def send_messages_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Answer independent prompts concurrently, outside the conversation.
+        
+        Each prompt is sent as a single user turn on top of the shared
+        system prompt. Concurrency is capped by config.max_in_flight, the
+        same limit every other request goes through.
+        """
+        prefix = self.conversation.get_prompt_prefix()
+        
+        async def answer(prompt: str) -> Optional[str]:
+            response_data = await self._make_api_request(
+                prefix + [{"role": "user", "content": prompt}]
+            )
+            if response_data is None:
+                return None
+            try:
+                return response_data['choices'][0]['message']['content']
+            except (KeyError, IndexError) as e:
+                print(f"ERROR: Unexpected API response: {e}")
+                return None
+        
+        return list(await asyncio.gather(*(answer(prompt) for prompt in prompts)))
     
     def reset_conversation(self) -> None:
         """Reset the conversation."""
+        self._cancel_summary()
         self.conversation.reset()
         print("Conversation has been reset.")
     
@@ -13,12 +13,28 @@ class ChatbotConfig:
     
     def __init__(self):
         self.api_key = os.environ.get("OPENAI_API_KEY")
-        self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.api_base = "https://api.openai.com/v1"
+        self.api_url = f"{self.api_base}/chat/completions"
         self.model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
         self.max_tokens = int(os.environ.get("OPENAI_MAX_TOKENS", "1000"))
         self.temperature = float(os.environ.get("OPENAI_TEMPERATURE", "0.7"))
+        self.max_turns = int(os.environ.get("OPENAI_MAX_TURNS", "10"))
+        self.summary_model = os.environ.get("OPENAI_SUMMARY_MODEL", "gpt-4o-mini")
+        self.summary_max_tokens = 200
         self.timeout = 30
+        self.stream = os.environ.get("OPENAI_STREAM", "true").lower() == "true"
+        self.max_retries = 3
+        self.retry_backoff = 0.3
+        self.max_in_flight = int(os.environ.get("OPENAI_MAX_IN_FLIGHT", "4"))
+        self.batch_poll_interval = 5
+        self.batch_max_poll_interval = 300
         self.memory_file = "data/user_memory.json"
+        self.conversation_log_file = "data/conversations/current.jsonl"
+        self.cache_file = "data/llm_cache"
+        self.cache_ttl = 3600
+        self.semantic_cache_enabled = os.environ.get("SEMANTIC_CACHE", "false").lower() == "true"
+        self.semantic_cache_file = "data/semantic_cache.faiss"
+        self.semantic_cache_threshold = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
         
     def validate(self) -> bool:
         """Validate that required configuration is present."""
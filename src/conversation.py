@@ -1,6 +1,8 @@
 """Conversation history management."""
 
-import json
+import os
+import shutil
+import orjson
 from typing import List, Dict, Optional
 from datetime import datetime
 
@@ -8,10 +10,18 @@ from datetime import datetime
 class ConversationManager:
     """Manages conversation history and context."""
     
-    def __init__(self, system_prompt: Optional[str] = None):
+    PREFIX_SIZE = 1
+    
+    def __init__(self, system_prompt: Optional[str] = None, max_turns: int = 10,
+                 log_file: str = "data/conversations/current.jsonl"):
         self.messages: List[Dict[str, str]] = []
+        self.max_turns = max_turns
+        self.summary: Optional[str] = None
+        self.log_file = log_file
+        self._open_log()
         self.system_prompt = system_prompt or self._default_system_prompt()
-        self.messages.append({"role": "system", "content": self.system_prompt})
+        for message in self._prefix_messages():
+            self._append(message)
         
     def _default_system_prompt(self) -> str:
         """Returns default system prompt for customer support."""
@@ -23,29 +33,124 @@ class ConversationManager:
         - Escalate complex issues when appropriate
         - Maintain a friendly and professional tone"""
     
+    def _prefix_messages(self) -> List[Dict[str, str]]:
+        """Returns the messages that open every conversation."""
+        return [{"role": "system", "content": self.system_prompt}]
+    
+    def _open_log(self) -> None:
+        """Start a fresh append-only log, keeping any previous session's log.
+        
+        Lines are buffered and flushed after each assistant reply, so a hard
+        crash loses at most the turn that was in progress.
+        """
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        self._rotate_log()
+        self._log = open(self.log_file, 'wb', buffering=65536)
+        self._last_offset = 0
+    
+    def _rotate_log(self) -> None:
+        """Move a non-empty log left by an earlier session to a timestamped name."""
+        if not os.path.exists(self.log_file) or os.path.getsize(self.log_file) == 0:
+            return
+        
+        modified = datetime.fromtimestamp(os.path.getmtime(self.log_file))
+        base = os.path.join(os.path.dirname(self.log_file), f"session_{modified:%Y%m%d_%H%M%S}")
+        target = f"{base}.jsonl"
+        suffix = 1
+        while os.path.exists(target):
+            target = f"{base}_{suffix}.jsonl"
+            suffix += 1
+        os.replace(self.log_file, target)
+    
+    def _log_message(self, message: Dict[str, str]) -> None:
+        """Append a message to the log without adding it to the history."""
+        self._log.write(orjson.dumps(message) + b"\n")
+    
+    def _append(self, message: Dict[str, str]) -> None:
+        """Add a message to the history and append it to the log."""
+        self._last_offset = self._log.tell()
+        self._log_message(message)
+        self.messages.append(message)
+    
+    def pop_message(self) -> Dict[str, str]:
+        """Remove the most recently added message from history and log."""
+        self._log.seek(self._last_offset)
+        self._log.truncate()
+        return self.messages.pop()
+    
     def add_user_message(self, content: str) -> None:
         """Add a user message to the conversation history."""
-        self.messages.append({"role": "user", "content": content})
+        self._append({"role": "user", "content": content})
     
     def add_assistant_message(self, content: str) -> None:
         """Add an assistant message to the conversation history."""
-        self.messages.append({"role": "assistant", "content": content})
+        self._append({"role": "assistant", "content": content})
+        self._log.flush()
     
     def get_messages(self) -> List[Dict[str, str]]:
         """Get all conversation messages."""
         return self.messages
     
+    def get_prompt_prefix(self) -> List[Dict[str, str]]:
+        """Get the leading system prompt message, without any history."""
+        return self.messages[:self.PREFIX_SIZE]
+    
+    def get_turn_context(self) -> List[Dict[str, str]]:
+        """Get the prompt prefix and the exchange before the latest user message."""
+        history = [m for m in self.messages[self.PREFIX_SIZE:-1] if m["role"] != "system"]
+        return self.messages[:self.PREFIX_SIZE] + history[-2:]
+    
+    def needs_summary(self) -> bool:
+        """Check whether history has outgrown the recent-turns window.
+        
+        Summarizing waits until another max_turns exchanges have piled up
+        beyond the window, so each summary covers many turns and the
+        messages after the prompt prefix stay unchanged in between.
+        """
+        history = len(self.messages) - self.PREFIX_SIZE - (1 if self.summary else 0)
+        return history > 4 * self.max_turns + 1
+    
+    def get_messages_to_summarize(self) -> List[Dict[str, str]]:
+        """Get the previous summary and the turns older than the window.
+        
+        The window keeps the last max_turns exchanges whole, plus the
+        latest user message if it has not been answered yet.
+        """
+        window = 2 * self.max_turns + (1 if self.messages[-1]["role"] == "user" else 0)
+        return self.messages[self.PREFIX_SIZE:len(self.messages) - window]
+    
+    def apply_summary(self, summary: str, count: int) -> None:
+        """Replace the oldest count history messages with a summary message."""
+        self.summary = summary
+        self.messages[self.PREFIX_SIZE:self.PREFIX_SIZE + count] = [
+            {"role": "system", "content": f"Prior conversation summary: {summary}"}
+        ]
+    
     def reset(self) -> None:
-        """Reset conversation, keeping only the system prompt."""
-        self.messages = [{"role": "system", "content": self.system_prompt}]
+        """Reset conversation, keeping only the system prompt.
+        
+        The log so far is rotated like a previous session's, so the
+        transcript before the reset is kept.
+        """
+        self.summary = None
+        self.messages = []
+        self._log.close()
+        self._open_log()
+        for message in self._prefix_messages():
+            self._append(message)
     
     def export_conversation(self, filename: Optional[str] = None) -> str:
-        """Export conversation to a JSON file."""
+        """Export conversation to a JSONL file."""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"data/conversations/conversation_{timestamp}.json"
+            filename = f"data/conversations/conversation_{timestamp}.jsonl"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.messages, f, indent=2, ensure_ascii=False)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self._log.flush()
+        shutil.copyfile(self.log_file, filename)
         
-        return filename
\ No newline at end of file
+        return filename
+    
+    def close(self) -> None:
+        """Flush and close the conversation log."""
+        self._log.close()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Semantic caching of chat responses using local embeddings.
+
+Requires the optional ``faiss-cpu``, ``fastembed`` and ``numpy`` packages.
+"""
+
+import os
+import hashlib
+import orjson
+from typing import List, Dict, Optional
+
+import faiss
+import numpy as np
+from fastembed import TextEmbedding
+
+
+class SemanticCache:
+    """Returns stored replies for user messages that mean the same thing.
+    
+    Vectors are L2-normalized so inner product equals cosine similarity.
+    Each entry also records a hash of the system prompt and the exchange
+    that preceded it, and a hit requires that hash to match, so a similar
+    question asked right after a different turn is never answered from
+    the cache.
+    """
+    
+    def __init__(self, index_file: str, threshold: float = 0.92,
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 search_k: int = 4):
+        self.index_file = index_file
+        self.entries_file = os.path.splitext(index_file)[0] + ".json"
+        self.threshold = threshold
+        self.search_k = search_k
+        self._model = TextEmbedding(model_name=model_name)
+        self.index: Optional[faiss.Index] = None
+        self.entries: List[Dict[str, str]] = []
+        self._load()
+    
+    def _load(self) -> None:
+        """Load a previously saved index and its entries."""
+        if os.path.exists(self.index_file) and os.path.exists(self.entries_file):
+            self.index = faiss.read_index(self.index_file)
+            with open(self.entries_file, 'rb') as f:
+                self.entries = orjson.loads(f.read())
+    
+    @staticmethod
+    def context_key(messages: List[Dict[str, str]]) -> str:
+        """Hash the context preceding the current user message."""
+        encoded = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text as a normalized (1, dim) float32 vector."""
+        vector = next(iter(self._model.embed([text])))
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+    
+    def get(self, vector: np.ndarray, context: str) -> Optional[str]:
+        """Return a cached reply for a similar message in the same context."""
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        
+        k = min(self.search_k, self.index.ntotal)
+        scores, ids = self.index.search(vector, k)
+        for score, idx in zip(scores[0], ids[0]):
+            if score < self.threshold:
+                break
+            entry = self.entries[idx]
+            if entry['context'] == context:
+                return entry['response']
+        return None
+    
+    def add(self, vector: np.ndarray, context: str, response: str) -> None:
+        """Store a reply under the given message embedding and context."""
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(vector.shape[1])
+        self.index.add(vector)
+        self.entries.append({"context": context, "response": response})
+    
+    def save(self) -> None:
+        """Persist the index and its entries to disk."""
+        if self.index is None:
+            return
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        faiss.write_index(self.index, self.index_file)
+        with open(self.entries_file, 'wb') as f:
+            f.write(orjson.dumps(self.entries))
@@ -0,0 +1,133 @@
+"""Tests for the Batch API client, using a mocked HTTP transport."""
+
+import asyncio
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import httpx
+import orjson
+
+from src.batch import BatchChatbot, replay_requests
+from src.config import ChatbotConfig
+
+
+def output_line(custom_id: str, content=None, status_code: int = 200) -> bytes:
+    """Encode one line of a batch output file."""
+    if content is None:
+        body = {"error": {"message": "failed"}}
+    else:
+        body = {"choices": [{"message": {"content": content}}]}
+    return orjson.dumps({
+        "custom_id": custom_id,
+        "response": {"status_code": status_code, "body": body}
+    })
+
+
+class ReplayRequestsTest(unittest.TestCase):
+    
+    def test_one_request_per_user_turn(self):
+        messages = [
+            {"role": "system", "content": "prompt"},
+            {"role": "user", "content": "q0"},
+            {"role": "assistant", "content": "a0"},
+            {"role": "user", "content": "q1"},
+            {"role": "assistant", "content": "a1"}
+        ]
+        requests = replay_requests(messages)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0], messages[:2])
+        self.assertEqual(requests[1], messages[:4])
+    
+    def test_no_user_messages(self):
+        self.assertEqual(replay_requests([{"role": "system", "content": "prompt"}]), [])
+
+
+class BatchClientTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.config = ChatbotConfig()
+        self.config.api_key = "test-key"
+        self.config.batch_poll_interval = 0
+        self.requests = []
+    
+    def run_batch(self, handler, coroutine):
+        """Run coroutine(chatbot) against a mocked API served by handler."""
+        def record(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return handler(request)
+        
+        async def run():
+            chatbot = BatchChatbot(self.config)
+            await chatbot._client.aclose()
+            chatbot._client = httpx.AsyncClient(
+                base_url=self.config.api_base,
+                transport=httpx.MockTransport(record)
+            )
+            try:
+                return await coroutine(chatbot)
+            finally:
+                await chatbot.aclose()
+        
+        with redirect_stdout(StringIO()):
+            return asyncio.run(run())
+    
+    def test_results_are_ordered_by_custom_id(self):
+        content = b"\n".join([
+            output_line("request-2", "two"),
+            output_line("request-0", "zero"),
+            output_line("request-1", None, status_code=500)
+        ]) + b"\n"
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.assertEqual(request.url.path, "/v1/files/file-out/content")
+            return httpx.Response(200, content=content)
+        
+        results = self.run_batch(
+            handler,
+            lambda chatbot: chatbot.get_results({"output_file_id": "file-out"}, 3)
+        )
+        self.assertEqual(results, ["zero", None, "two"])
+    
+    def test_missing_output_file(self):
+        results = self.run_batch(
+            lambda request: httpx.Response(500),
+            lambda chatbot: chatbot.get_results({"status": "failed"}, 2)
+        )
+        self.assertEqual(results, [None, None])
+        self.assertEqual(self.requests, [])
+    
+    def test_run_submits_polls_and_downloads(self):
+        statuses = iter(["in_progress", "completed"])
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/v1/files":
+                return httpx.Response(200, json={"id": "file-in"})
+            if path == "/v1/batches":
+                self.assertEqual(orjson.loads(request.content)["input_file_id"], "file-in")
+                return httpx.Response(200, json={"id": "batch-1"})
+            if path == "/v1/batches/batch-1":
+                return httpx.Response(200, json={
+                    "status": next(statuses),
+                    "output_file_id": "file-out"
+                })
+            return httpx.Response(200, content=output_line("request-0", "hi") + b"\n")
+        
+        messages = [[{"role": "user", "content": "hello"}]]
+        results = self.run_batch(handler, lambda chatbot: chatbot.run(messages))
+        self.assertEqual(results, ["hi"])
+        
+        uploaded = self.requests[0].content
+        self.assertIn(b'"custom_id":"request-0"', uploaded)
+    
+    def test_http_error_fails_every_request(self):
+        results = self.run_batch(
+            lambda request: httpx.Response(401),
+            lambda chatbot: chatbot.run([[], []])
+        )
+        self.assertEqual(results, [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
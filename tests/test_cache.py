@@ -0,0 +1,55 @@
+"""Tests for the exact-match response cache."""
+
+import os
+import tempfile
+import unittest
+
+from src.cache import LLMCache
+
+
+class LLMCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self.tmp.name, "llm_cache"), ttl=60)
+    
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+    
+    def test_key_is_stable_across_dict_ordering(self):
+        messages = [{"role": "user", "content": "hi"}]
+        reordered = [{"content": "hi", "role": "user"}]
+        self.assertEqual(
+            LLMCache.make_key("gpt-4o-mini", messages, 0, 100),
+            LLMCache.make_key("gpt-4o-mini", reordered, 0, 100)
+        )
+    
+    def test_key_changes_with_request(self):
+        messages = [{"role": "user", "content": "hi"}]
+        key = LLMCache.make_key("gpt-4o-mini", messages, 0, 100)
+        self.assertNotEqual(key, LLMCache.make_key("gpt-4o", messages, 0, 100))
+        self.assertNotEqual(key, LLMCache.make_key("gpt-4o-mini", messages, 0, 200))
+        self.assertNotEqual(key, LLMCache.make_key(
+            "gpt-4o-mini", messages + [{"role": "assistant", "content": "hello"}], 0, 100
+        ))
+    
+    def test_get_returns_stored_value(self):
+        self.cache.set("key", "reply")
+        self.assertEqual(self.cache.get("key"), "reply")
+        self.assertIsNone(self.cache.get("missing"))
+    
+    def test_expired_entry_is_dropped(self):
+        self.cache.set("key", "reply", ttl=-1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertNotIn("key", self.cache._store)
+    
+    def test_entries_persist_across_instances(self):
+        self.cache.set("key", "reply")
+        self.cache.close()
+        self.cache = LLMCache(self.cache.cache_file, ttl=60)
+        self.assertEqual(self.cache.get("key"), "reply")
+
+
+if __name__ == "__main__":
+    unittest.main()
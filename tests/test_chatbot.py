@@ -0,0 +1,154 @@
+"""Tests for the OpenAI client, using a mocked HTTP transport."""
+
+import os
+import asyncio
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import httpx
+import orjson
+
+from src.chatbot import OpenAIChatbot
+from src.config import ChatbotConfig
+
+
+def sse_body(*tokens: str) -> bytes:
+    """Encode tokens as an OpenAI-style server-sent event stream."""
+    events = [b'data: {"choices":[]}']
+    for token in tokens:
+        chunk = {"choices": [{"delta": {"content": token}}]}
+        events.append(b"data: " + orjson.dumps(chunk))
+    events.append(b'data: {"choices":[{"delta":{},"finish_reason":"stop"}]}')
+    events.append(b"data: [DONE]")
+    return b"\n\n".join(events) + b"\n\n"
+
+
+class ChatbotTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = ChatbotConfig()
+        self.config.api_key = "test-key"
+        self.config.retry_backoff = 0
+        self.config.cache_file = os.path.join(self.tmp.name, "llm_cache")
+        self.config.conversation_log_file = os.path.join(self.tmp.name, "current.jsonl")
+        self.requests = []
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class StreamingTest(ChatbotTestCase):
+    
+    def send(self, responses):
+        """Send one streamed message, answering requests from responses in order."""
+        responses = iter(responses)
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(orjson.loads(request.content))
+            return next(responses)
+        
+        async def run():
+            chatbot = OpenAIChatbot(self.config)
+            await chatbot._client.aclose()
+            chatbot._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            tokens = []
+            try:
+                reply = await chatbot.send_message("hello", on_token=tokens.append)
+                return reply, tokens, list(chatbot.conversation.messages)
+            finally:
+                await chatbot.aclose()
+        
+        with redirect_stdout(StringIO()):
+            return asyncio.run(run())
+    
+    def test_tokens_are_streamed_and_joined(self):
+        reply, tokens, messages = self.send([httpx.Response(200, content=sse_body("Hel", "lo", "!"))])
+        self.assertEqual(tokens, ["Hel", "lo", "!"])
+        self.assertEqual(reply, "Hello!")
+        self.assertEqual(messages[-1], {"role": "assistant", "content": "Hello!"})
+        self.assertTrue(self.requests[0]["stream"])
+    
+    def test_retryable_status_is_retried(self):
+        reply, tokens, _ = self.send([
+            httpx.Response(503),
+            httpx.Response(200, content=sse_body("ok"))
+        ])
+        self.assertEqual(reply, "ok")
+        self.assertEqual(len(self.requests), 2)
+    
+    def test_gives_up_after_max_retries(self):
+        self.config.max_retries = 1
+        reply, tokens, messages = self.send([httpx.Response(503), httpx.Response(503)])
+        self.assertIsNone(reply)
+        self.assertEqual(tokens, [])
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(messages[-1]["role"], "system")
+    
+    def test_empty_stream_is_a_failure_and_not_cached(self):
+        self.config.temperature = 0
+        filtered = b'data: {"choices":[{"delta":{},"finish_reason":"content_filter"}]}\n\ndata: [DONE]\n\n'
+        reply, tokens, messages = self.send([httpx.Response(200, content=filtered)])
+        self.assertIsNone(reply)
+        self.assertEqual(messages[-1]["role"], "system")
+        
+        reply, _, _ = self.send([httpx.Response(200, content=sse_body("ok"))])
+        self.assertEqual(reply, "ok")
+        self.assertEqual(len(self.requests), 2)
+    
+    def test_error_event_is_a_failure(self):
+        body = sse_body("par") + b'data: {"error":{"message":"overloaded"}}\n\n'
+        body = body.replace(b"data: [DONE]\n\n", b"")
+        reply, _, messages = self.send([httpx.Response(200, content=body)])
+        self.assertIsNone(reply)
+        self.assertEqual(messages[-1]["role"], "system")
+    
+    def test_malformed_event_is_a_failure(self):
+        body = sse_body("par").replace(b"data: [DONE]", b"data: <html>")
+        reply, _, messages = self.send([httpx.Response(200, content=body)])
+        self.assertIsNone(reply)
+        self.assertEqual(messages[-1]["role"], "system")
+    
+    def test_client_error_is_not_retried(self):
+        reply, _, _ = self.send([httpx.Response(401)])
+        self.assertIsNone(reply)
+        self.assertEqual(len(self.requests), 1)
+
+
+
+class BackgroundSummaryTest(ChatbotTestCase):
+    
+    def test_summary_runs_after_reply_and_applies_before_next_request(self):
+        self.config.max_turns = 1
+        self.config.summary_model = "summary-model"
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = orjson.loads(request.content)
+            self.requests.append(body)
+            content = "short" if body["model"] == "summary-model" else "answer"
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+        
+        async def run():
+            chatbot = OpenAIChatbot(self.config)
+            await chatbot._client.aclose()
+            chatbot._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                for i in range(4):
+                    self.assertEqual(await chatbot.send_message(f"question {i}"), "answer")
+            finally:
+                await chatbot.aclose()
+        
+        with redirect_stdout(StringIO()):
+            asyncio.run(run())
+        
+        models = [body["model"] for body in self.requests]
+        self.assertEqual(models.index("summary-model"), 3)
+        last = self.requests[-1]["messages"]
+        self.assertEqual(last[1]["content"], "Prior conversation summary: short")
+        self.assertEqual([m["content"] for m in last[2:]], ["question 2", "answer", "question 3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for conversation history management."""
+
+import os
+import glob
+import tempfile
+import unittest
+
+import orjson
+
+from src.conversation import ConversationManager
+
+
+class ConversationTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "conversations", "current.jsonl")
+        self.conversation = ConversationManager(max_turns=2, log_file=self.log_file)
+    
+    def tearDown(self):
+        self.conversation.close()
+        self.tmp.cleanup()
+    
+    def add_turns(self, count: int) -> None:
+        for i in range(count):
+            self.conversation.add_user_message(f"question {i}")
+            self.conversation.add_assistant_message(f"answer {i}")
+
+
+class TurnContextTest(ConversationTestCase):
+    
+    def test_first_turn_context_is_system_prompt(self):
+        self.conversation.add_user_message("hello")
+        self.assertEqual(self.conversation.get_turn_context(), self.conversation.messages[:1])
+    
+    def test_context_is_previous_exchange_only(self):
+        self.add_turns(3)
+        self.conversation.add_user_message("next")
+        context = self.conversation.get_turn_context()
+        self.assertEqual([m["content"] for m in context[1:]], ["question 2", "answer 2"])
+        self.assertEqual(context[0], self.conversation.messages[0])
+
+
+class SummaryWindowTest(ConversationTestCase):
+    
+    def test_no_summary_until_window_overflows_by_max_turns(self):
+        self.add_turns(4)
+        self.conversation.add_user_message("next")
+        self.assertFalse(self.conversation.needs_summary())
+        
+        self.conversation.add_assistant_message("reply")
+        self.conversation.add_user_message("one more")
+        self.assertTrue(self.conversation.needs_summary())
+    
+    def test_summarizes_everything_before_the_window(self):
+        self.add_turns(5)
+        self.conversation.add_user_message("latest")
+        old = self.conversation.get_messages_to_summarize()
+        self.assertEqual(len(old), 6)
+        self.assertEqual(old[0]["content"], "question 0")
+        self.assertEqual(old[-1]["content"], "answer 2")
+    
+    def test_window_keeps_whole_exchanges_after_a_reply(self):
+        self.add_turns(5)
+        old = self.conversation.get_messages_to_summarize()
+        self.assertEqual(old[-1]["content"], "answer 2")
+    
+    def test_apply_summary_cuts_history_back_to_window(self):
+        self.add_turns(5)
+        self.conversation.add_user_message("latest")
+        old = self.conversation.get_messages_to_summarize()
+        self.conversation.apply_summary("earlier chat", len(old))
+        
+        messages = self.conversation.messages
+        self.assertEqual(messages[1]["content"], "Prior conversation summary: earlier chat")
+        self.assertEqual(len(messages), 1 + 1 + 2 * 2 + 1)
+        self.assertEqual(messages[-1]["content"], "latest")
+        self.assertFalse(self.conversation.needs_summary())
+    
+    def test_next_summary_rolls_previous_one_in(self):
+        self.add_turns(5)
+        self.conversation.add_user_message("latest")
+        self.conversation.apply_summary("first", len(self.conversation.get_messages_to_summarize()))
+        self.conversation.add_assistant_message("reply")
+        
+        turns = 0
+        while not self.conversation.needs_summary():
+            self.add_turns(1)
+            turns += 1
+        self.assertGreaterEqual(turns, 2)
+        self.assertEqual(
+            self.conversation.get_messages_to_summarize()[0]["content"],
+            "Prior conversation summary: first"
+        )
+    
+    def test_reset_clears_summary(self):
+        self.add_turns(5)
+        self.conversation.add_user_message("latest")
+        self.conversation.apply_summary("earlier", len(self.conversation.get_messages_to_summarize()))
+        self.conversation.reset()
+        self.assertIsNone(self.conversation.summary)
+        self.assertEqual(len(self.conversation.messages), 1)
+
+
+class ConversationLogTest(ConversationTestCase):
+    
+    def read_log(self, path=None):
+        with open(path or self.log_file, 'rb') as f:
+            return [orjson.loads(line)["content"] for line in f]
+    
+    def test_messages_are_appended_and_flushed_per_reply(self):
+        self.add_turns(1)
+        self.assertEqual(self.read_log()[1:], ["question 0", "answer 0"])
+    
+    def test_pop_message_truncates_last_line(self):
+        self.add_turns(1)
+        self.conversation.add_user_message("failed request")
+        popped = self.conversation.pop_message()
+        self.conversation.add_user_message("retry")
+        self.conversation.add_assistant_message("answer")
+        
+        self.assertEqual(popped["content"], "failed request")
+        self.assertEqual(self.read_log()[1:], ["question 0", "answer 0", "retry", "answer"])
+        self.assertEqual(
+            [m["content"] for m in self.conversation.messages[1:]],
+            ["question 0", "answer 0", "retry", "answer"]
+        )
+    
+    def test_reset_starts_log_over(self):
+        self.add_turns(2)
+        self.conversation.reset()
+        self.conversation._log.flush()
+        self.assertEqual(len(self.read_log()), 1)
+        
+        rotated = glob.glob(os.path.join(os.path.dirname(self.log_file), "session_*.jsonl"))
+        self.assertEqual(len(rotated), 1)
+        self.assertEqual(len(self.read_log(rotated[0])), 5)
+    
+    def test_previous_session_log_is_kept(self):
+        self.add_turns(1)
+        self.conversation.close()
+        self.conversation = ConversationManager(max_turns=2, log_file=self.log_file)
+        
+        rotated = glob.glob(os.path.join(os.path.dirname(self.log_file), "session_*.jsonl"))
+        self.assertEqual(len(rotated), 1)
+        self.assertEqual(self.read_log(rotated[0])[1:], ["question 0", "answer 0"])
+    
+    def test_export_copies_log(self):
+        self.add_turns(1)
+        exported = os.path.join(self.tmp.name, "export.jsonl")
+        self.conversation.export_conversation(exported)
+        self.assertEqual(self.read_log(exported), self.read_log())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Tests for picking the user's name out of their messages."""
+
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import orjson
+
+from main import ConversationManager, UserMemory
+
+
+class NameExtractionTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.memory = UserMemory(os.path.join(self.tmp.name, "user_memory.json"))
+        self.conversation = ConversationManager(
+            self.memory,
+            log_file=os.path.join(self.tmp.name, "conversations", "current.jsonl")
+        )
+    
+    def tearDown(self):
+        self.conversation.close()
+        self.tmp.cleanup()
+    
+    def extract(self, message: str):
+        with redirect_stdout(StringIO()):
+            self.conversation.add_user_message(message)
+        return self.memory.get_user_name()
+    
+    def test_common_introductions(self):
+        cases = {
+            "Hi, my name is ali.": "Ali",
+            "call me SAM please": "Sam",
+            "I am jordan": "Jordan",
+            "I'm o'neil": "O'neil",
+            "I’m Kim": "Kim",
+            "this is Priya from billing": "Priya",
+        }
+        for message, name in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(self.extract(message), name)
+    
+    def test_name_change_changes_turn_context(self):
+        self.extract("hello")
+        before = self.conversation.get_turn_context()
+        self.memory.set_user_name("Bob")
+        self.conversation.refresh_memory()
+        after = self.conversation.get_turn_context()
+        self.assertNotEqual(before, after)
+        self.assertIn("Bob", after[1]["content"])
+    
+    def test_explicit_introduction_wins(self):
+        self.assertEqual(self.extract("This is urgent, my name is Bob"), "Bob")
+    
+    def test_no_introduction(self):
+        for message in ["hello there", "im going home", "I aim to please", "this is X"]:
+            with self.subTest(message=message):
+                self.assertIsNone(self.extract(message))
+    
+    def test_memory_message_is_refreshed(self):
+        self.extract("my name is Dana")
+        self.assertIn("Dana", self.conversation.messages[1]["content"])
+    
+    def test_memory_update_is_logged(self):
+        self.extract("my name is Dana")
+        self.conversation._log.flush()
+        with open(self.conversation.log_file, 'rb') as f:
+            logged = [orjson.loads(line)["content"] for line in f]
+        self.assertIn("Dana", logged[-2])
+        self.assertEqual(logged[-1], "my name is Dana")
+
+
+if __name__ == "__main__":
+    unittest.main()